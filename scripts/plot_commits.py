@@ -1,7 +1,21 @@
 from ghweekly.main import fetch_weekly_commits
-import matplotlib.pyplot as plt
 from datetime import datetime
 import os
+import sys
+import matplotlib
+import numpy as np
+
+# Headless runs (e.g. the daily CI job) only save the PNG: render with the
+# plain Agg rasterizer instead of loading a GUI backend. Same rule as
+# ghweekly.plotting._has_display, inlined because the daily job runs this
+# script against the PyPI release: only Linux needs an X11/Wayland display.
+HEADLESS = sys.platform.startswith("linux") and not (
+    os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY")
+)
+if HEADLESS:
+    matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
 
 USERNAME = "bhimrazy"
 REPOS = [
@@ -34,16 +48,22 @@ ax = df.plot(
 )
 
 for patch in ax.patches:
-    h = patch.get_height()
-    if h > 0:
-        x = patch.get_x() + patch.get_width() / 2
-        y = patch.get_y() + h / 2
-        ax.text(x, y, int(h), ha="center", va="center", fontsize=8, color="white")
+    patch.set_rasterized(True)
+
+# Label only segments taller than 2% of the tallest; smaller labels are
+# unreadable and each one is a separate artist to lay out.
+x, y, w, h = np.array(
+    [(p.get_x(), p.get_y(), p.get_width(), p.get_height()) for p in ax.patches]
+).T
+mask = h > max(h.max() * 0.02, 0)
+for xi, yi, hi in zip(x[mask] + w[mask] / 2, y[mask] + h[mask] / 2, h[mask]):
+    ax.text(xi, yi, int(hi), ha="center", va="center", fontsize=8, color="white")
 
-ax.set_xticklabels([d.strftime("%Y-%m-%d") for d in df.index], rotation=45, ha="right")
+ax.set_xticklabels(df.index.strftime("%Y-%m-%d").tolist(), rotation=45, ha="right")
 plt.title(f"Weekly GitHub Contributions by Repo ({USERNAME})", fontsize=16, pad=20)
 plt.xlabel("Start of the week (Monday)")
 plt.ylabel("Merged Commits")
 plt.tight_layout()
 plt.savefig("weekly_commits.png", dpi=300)
-plt.show()
+if not HEADLESS:
+    plt.show()
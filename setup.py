@@ -2,14 +2,19 @@ from setuptools import setup, find_packages
 
 setup(
     name="ghweekly",
-    version="0.1.4",
+    version="0.1.5",
     packages=find_packages(where="src"),
     package_dir={"": "src"},
     install_requires=[
         "requests",
-        "pandas",
+        "numpy",
+        "pandas>=2",
         "matplotlib",
     ],
+    extras_require={
+        "cache": ["pyarrow", "requests-cache"],
+        "fast": ["orjson"],
+    },
     entry_points={
         "console_scripts": [
             "ghweekly=ghweekly.cli:main",
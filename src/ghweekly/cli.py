@@ -1,7 +1,36 @@
 import argparse
+import re
+from datetime import date, datetime
 
+# Matching once and building the datetime directly avoids strptime
+# re-interpreting its format string on every call.
+_DATE_RE = re.compile(r"([0-9]{4})-([0-9]{2})-([0-9]{2})")
 
-def main():
+_REPO_RE = re.compile(r"[A-Za-z0-9_.\-]+/[A-Za-z0-9_.\-]+")
+
+
+def validate_date(value: str) -> datetime:
+    """Parse a ``YYYY-MM-DD`` command-line date."""
+    match = _DATE_RE.fullmatch(value)
+    try:
+        if match:
+            year, month, day = match.groups()
+            return datetime(int(year), int(month), int(day))
+    except ValueError:  # out-of-range month or day
+        pass
+    raise argparse.ArgumentTypeError(f"invalid date: {value!r} (expected YYYY-MM-DD)")
+
+
+def validate_repo(value: str) -> str:
+    """Check that a command-line repository is in ``owner/repo`` form."""
+    if not _REPO_RE.fullmatch(value):
+        raise argparse.ArgumentTypeError(
+            f"invalid repository: {value!r} (expected owner/repo)"
+        )
+    return value
+
+
+def create_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         description="Fetch weekly GitHub commits for a user across multiple repos."
     )
@@ -9,73 +38,84 @@ def main():
     parser.add_argument(
         "--repos",
         nargs="+",
+        type=validate_repo,
         required=True,
         help="List of GitHub repositories (org/repo)",
     )
-    from datetime import datetime
-
     current_year_start = f"{datetime.now().year}-01-01"
     parser.add_argument(
         "--start",
+        type=validate_date,
         required=False,
         default=current_year_start,
         help=f"Start date (YYYY-MM-DD), default: {current_year_start}",
     )
     parser.add_argument(
         "--end",
+        type=validate_date,
         default=None,
         help="End date (YYYY-MM-DD)",
     )
     parser.add_argument(
         "--token", help="GitHub token (optional, for higher rate limits)"
     )
+    parser.add_argument(
+        "--roles",
+        nargs="+",
+        choices=["author", "committer"],
+        default=["author"],
+        help="Count commits the user authored, committed, or both (default: author)",
+    )
     parser.add_argument("--plot", action="store_true", help="Show plot")
+    parser.add_argument(
+        "--output",
+        default="weekly_commits.png",
+        help="File to save the plot to (default: weekly_commits.png)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Disable the on-disk API response and result cache",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=int,
+        default=3600,
+        help="Seconds to keep cached API responses and results (default: 3600)",
+    )
 
-    args = parser.parse_args()
+    return parser
 
-    # Only import heavy modules after parsing args for fast help/parse
-    from datetime import datetime
 
-    from ghweekly.main import fetch_weekly_commits
+def main():
+    args = create_parser().parse_args()
 
-    # Only import matplotlib if plotting is requested
-    if args.plot:
-        import matplotlib.pyplot as plt
+    # Only import heavy modules (pandas, requests) after parsing args so
+    # --help and usage errors stay fast
+    from ghweekly.main import create_session, fetch_weekly_commits
 
-    end_date = args.end or datetime.now().strftime("%Y-%m-%d")
+    end_date = args.end or datetime.combine(date.today(), datetime.min.time())
     headers = {"Authorization": f"token {args.token}"} if args.token else {}
+    cache_ttl = None if args.no_cache else args.cache_ttl
     df = fetch_weekly_commits(
         username=args.username,
         repos=args.repos,
-        start=datetime.fromisoformat(args.start),
-        end=datetime.fromisoformat(end_date),
+        start=args.start,
+        end=end_date,
         headers=headers,
+        session=create_session(cache_ttl),
+        cache_ttl=cache_ttl,
+        roles=args.roles,
     )
 
     print(df)
 
     # generate plots
     if args.plot:
-        ax = df.plot(
-            kind="bar", stacked=True, figsize=(14, 6), colormap="tab20", width=0.8
-        )
-        for patch in ax.patches:
-            h = patch.get_height()
-            if h > 0:
-                x = patch.get_x() + patch.get_width() / 2
-                y = patch.get_y() + h / 2
-                ax.text(
-                    x, y, int(h), ha="center", va="center", fontsize=8, color="white"
-                )
-        ax.set_xticklabels(
-            [d.strftime("%Y-%m-%d") for d in df.index], rotation=45, ha="right"
-        )
-        plt.title(f"Weekly GitHub Contributions by Repo ({args.username})")
-        plt.xlabel("Start of the week (Monday)")
-        plt.ylabel("Merged Commits")
-        plt.tight_layout()
-        plt.savefig("weekly_commits.png", dpi=300)
-        plt.show()
+        # Only import matplotlib if plotting is requested
+        from ghweekly.plotting import create_weekly_commits_plot
+
+        create_weekly_commits_plot(df, args.username, output_file=args.output)
 
 
 if __name__ == "__main__":
@@ -1,7 +1,764 @@
+import contextlib
+import hashlib
+import json
+import os
+import numpy as np
 import requests
 import pandas as pd
-from datetime import datetime
-from typing import List, Optional, Dict
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
+import time
+import zipfile
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, Dict, Sequence, Set, Tuple
+from urllib.parse import parse_qs, urlparse
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import requests_cache
+except ImportError:  # optional: pip install ghweekly[cache]
+    requests_cache = None
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:  # optional: pip install ghweekly[fast]
+    _loads = json.loads
+
+MAX_WORKERS = 8
+PAGE_WORKERS = 4
+SEARCH_URL = "https://api.github.com/search/commits"
+GRAPHQL_URL = "https://api.github.com/graphql"
+SEARCH_RESULT_LIMIT = 1000
+RATE_LIMIT_LOW_WATER = 5
+# Waits longer than this are announced, as an exhausted budget can take up to
+# an hour to reset.
+RATE_LIMIT_NOTICE_SECONDS = 5
+ETAG_CACHE_SIZE = 1024
+# Seconds that anything cached for a range reaching today stays fresh.
+CURRENT_WEEK_TTL = 60
+# Weekly counts per repo fit comfortably in 16 bits; anything above saturates.
+COUNT_DTYPE = np.uint16
+CACHE_DIR = Path.home() / ".cache" / "ghweekly"
+SEARCH_ACCEPT = {"Accept": "application/vnd.github.cloak-preview+json"}
+
+
+def _retry_policy() -> Retry:
+    # Exponential backoff with random jitter, so concurrent workers retrying
+    # the same outage don't come back in lockstep; 429s honour Retry-After.
+    options = dict(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 502, 503, 504],
+        raise_on_status=False,
+    )
+    try:
+        return Retry(**options, backoff_jitter=0.5)
+    except TypeError:  # urllib3 < 2 has no jitter
+        return Retry(**options)
+
+
+def create_session(cache_ttl: Optional[int] = None) -> requests.Session:
+    """Create a keep-alive session for api.github.com.
+
+    Pages and repos reuse pooled TLS connections and transient 5xx responses
+    are retried with backoff by urllib3. With a ``cache_ttl`` (and
+    requests-cache installed) responses are also cached on disk, honouring
+    GitHub's Cache-Control/ETag headers so revalidations come back as 304s.
+    """
+    if cache_ttl and requests_cache is not None:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        session = requests_cache.CachedSession(
+            str(CACHE_DIR / "http_cache"),
+            backend="sqlite",
+            expire_after=cache_ttl,
+            cache_control=True,
+        )
+    else:
+        session = requests.Session()
+    session.mount(
+        "https://",
+        HTTPAdapter(
+            pool_connections=16,
+            # Every repo worker may have all of its page workers in flight.
+            pool_maxsize=MAX_WORKERS * PAGE_WORKERS,
+            max_retries=_retry_policy(),
+        ),
+    )
+    return session
+
+
+_SESSION = create_session()
+
+
+def _is_cached_session(session: requests.Session) -> bool:
+    return requests_cache is not None and isinstance(
+        session, requests_cache.CachedSession
+    )
+
+
+def _reaches_today(end: datetime) -> bool:
+    # The current week is still changing, so cached results for such a range
+    # are kept for at most CURRENT_WEEK_TTL.
+    return end.date() >= date.today()
+
+
+def _cache_options(session: requests.Session, end: datetime) -> Dict[str, Any]:
+    if _is_cached_session(session) and _reaches_today(end):
+        return {"expire_after": CURRENT_WEEK_TTL}
+    return {}
+
+
+# Latest (remaining, reset) budget reported by GitHub per rate-limit resource
+# ("core", "search", "graphql"), shared by every worker thread.
+_RATE_LIMITS: Dict[str, Tuple[int, int]] = {}
+_RATE_LIMIT_LOCK = threading.Lock()
+
+
+def _rate_limit_resource(url: str) -> str:
+    if url.startswith(SEARCH_URL):
+        return "search"
+    return "graphql" if url == GRAPHQL_URL else "core"
+
+
+def _record_rate_limit(resp: requests.Response) -> None:
+    remaining = resp.headers.get("X-RateLimit-Remaining")
+    if remaining is None:
+        return
+    resource = resp.headers.get("X-RateLimit-Resource", "core")
+    reset = int(resp.headers.get("X-RateLimit-Reset", "0"))
+    with _RATE_LIMIT_LOCK:
+        _RATE_LIMITS[resource] = (int(remaining), reset)
+
+
+def _respect_rate_limit(resource: str) -> None:
+    # Only pace requests once the budget is nearly spent, spreading the wait
+    # until the window resets over the requests that are still allowed. Each
+    # paced request claims one of them, so concurrent workers space out
+    # instead of all waking at once.
+    with _RATE_LIMIT_LOCK:
+        remaining, reset = _RATE_LIMITS.get(resource, (RATE_LIMIT_LOW_WATER, 0))
+        if remaining >= RATE_LIMIT_LOW_WATER:
+            return
+        _RATE_LIMITS[resource] = (max(remaining - 1, 0), reset)
+    wait = max(0, reset - time.time()) / max(remaining, 1)
+    if wait > RATE_LIMIT_NOTICE_SECONDS:
+        print(
+            f"GitHub {resource} rate limit nearly used up, waiting {wait:.0f}s "
+            "(use --token for a higher limit)"
+        )
+    time.sleep(wait)
+
+
+def _response_json(resp: requests.Response) -> Any:
+    """Decode a response body, or return ``None`` if it isn't valid JSON."""
+    try:
+        return _loads(resp.content)
+    except ValueError:  # json and orjson decode errors both subclass it
+        return None
+
+
+# ETag, decoded body and Link relations of recently fetched pages, keyed by URL
+# and query parameters, so repeat fetches can be revalidated with a 304. Bounded
+# as an LRU so long-running callers don't keep every page body forever.
+_ETAG_CACHE: "OrderedDict[Tuple[str, Tuple], Tuple[str, Any, Dict]]" = OrderedDict()
+_ETAG_CACHE_LOCK = threading.Lock()
+
+
+def _etag_lookup(key: Tuple[str, Tuple]) -> Optional[Tuple[str, Any, Dict]]:
+    with _ETAG_CACHE_LOCK:
+        cached = _ETAG_CACHE.get(key)
+        if cached is not None:
+            _ETAG_CACHE.move_to_end(key)
+        return cached
+
+
+def _etag_store(key: Tuple[str, Tuple], entry: Tuple[str, Any, Dict]) -> None:
+    with _ETAG_CACHE_LOCK:
+        _ETAG_CACHE[key] = entry
+        _ETAG_CACHE.move_to_end(key)
+        while len(_ETAG_CACHE) > ETAG_CACHE_SIZE:
+            _ETAG_CACHE.popitem(last=False)
+
+
+def _get_json(
+    session: requests.Session,
+    url: str,
+    params: Dict[str, Any],
+    headers: Optional[Dict],
+    end: datetime,
+) -> Tuple[requests.Response, Any, Dict]:
+    """GET a GitHub API page, revalidating previously seen pages by ETag.
+
+    Returns the response, its decoded body (``None`` when the request failed)
+    and its parsed Link header. A 304 reuses the body and links of the
+    earlier call.
+    """
+    key = (url, tuple(sorted(params.items())))
+    cached = _etag_lookup(key)
+    if cached is not None:
+        headers = {**(headers or {}), "If-None-Match": cached[0]}
+
+    _respect_rate_limit(_rate_limit_resource(url))
+    resp = session.get(
+        url, headers=headers, params=params, **_cache_options(session, end)
+    )
+    _record_rate_limit(resp)
+    if resp.status_code == 304 and cached is not None:
+        return resp, cached[1], cached[2]
+    if resp.status_code != 200:
+        return resp, None, {}
+
+    data = _response_json(resp)
+    if data is None:
+        return resp, None, {}
+    etag = resp.headers.get("ETag")
+    if etag:
+        _etag_store(key, (etag, data, resp.links))
+    return resp, data, resp.links
+
+
+def fetch_commits_for_repo(
+    full_repo: str,
+    username: str,
+    start: datetime,
+    end: datetime,
+    headers: Optional[Dict] = None,
+    session: Optional[requests.Session] = None,
+    roles: Sequence[str] = ("author",),
+    cache_ttl: Optional[int] = None,
+) -> np.ndarray:
+    """Fetch the dates of ``username``'s commits to ``full_repo``.
+
+    ``roles`` selects whether commits the user authored, committed or both
+    (``("author", "committer")``) are counted; a commit matching several
+    roles is counted once. With a ``cache_ttl`` a complete result is kept on
+    disk, so reruns and other repo combinations skip the API for this repo.
+    """
+    commit_dates, _ = _fetch_commits_for_repo(
+        full_repo, username, start, end, headers, session, roles, cache_ttl
+    )
+    return commit_dates
+
+
+def _fetch_commits_for_repo(
+    full_repo: str,
+    username: str,
+    start: datetime,
+    end: datetime,
+    headers: Optional[Dict],
+    session: Optional[requests.Session],
+    roles: Sequence[str],
+    cache_ttl: Optional[int],
+) -> Tuple[np.ndarray, bool]:
+    """Return the repo's commit dates and whether every page was fetched."""
+    session = session or _SESSION
+    cache_path = None
+    if cache_ttl:
+        cache_path = _dates_cache_path(full_repo, username, start, end, roles)
+        cached = _read_cached_dates(cache_path)
+        if cached is not None:
+            commit_dates, validators, age = cached
+            ttl = min(cache_ttl, CURRENT_WEEK_TTL) if _reaches_today(end) else cache_ttl
+            if age < ttl:
+                return commit_dates, True
+            # Past its TTL a result is still good if GitHub answers 304 for
+            # the first page of every query behind it.
+            if validators and _unchanged(session, validators, headers):
+                _touch(cache_path)
+                return commit_dates, True
+
+    seen_shas: Set[str] = set()
+    results = [
+        _fetch_role(full_repo, username, role, start, end, headers, session, seen_shas)
+        for role in roles
+    ]
+    commit_dates = _concat_dates([dates for dates, _ in results])
+    complete = all(complete for _, complete in results)
+    if cache_path is not None and complete:
+        validators = _first_page_validators(full_repo, username, start, end, roles)
+        _write_cached_dates(cache_path, commit_dates, validators)
+    return commit_dates, complete
+
+
+def _dates_cache_path(
+    full_repo: str,
+    username: str,
+    start: datetime,
+    end: datetime,
+    roles: Sequence[str],
+) -> Path:
+    key = f"{full_repo}|{username}|{start.isoformat()}|{end.isoformat()}"
+    key += f"|{','.join(roles)}"
+    digest = hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+    return CACHE_DIR / "commits" / f"{digest}.npz"
+
+
+def _read_cached_dates(path: Path) -> Optional[Tuple[np.ndarray, List, float]]:
+    """Return cached commit dates, their ETag validators and age in seconds."""
+    try:
+        age = time.time() - path.stat().st_mtime
+        with np.load(path) as cached:
+            return cached["dates"], json.loads(str(cached["validators"])), age
+    # missing, truncated (BadZipFile, EOFError) or old file
+    except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+        return None
+
+
+def _write_cached_dates(
+    path: Path, commit_dates: np.ndarray, validators: Optional[List]
+) -> None:
+    # Written next to the final path and swapped in, so an interrupted run
+    # never leaves a half-written cache file behind.
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "wb") as f:
+            np.savez(f, dates=commit_dates, validators=json.dumps(validators))
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+
+
+def _touch(path: Path) -> None:
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _search_params(
+    full_repo: str, username: str, role: str, start: datetime, end: datetime
+) -> Dict[str, Any]:
+    query = (
+        f"{role}:{username} repo:{full_repo} "
+        f"committer-date:{start.date()}..{end.date()}"
+    )
+    return {"q": query, "per_page": 100}
+
+
+def _commits_params(
+    username: str, role: str, start: datetime, end: datetime
+) -> Dict[str, Any]:
+    return {
+        role: username,
+        "since": start.isoformat() + "Z",
+        "until": end.isoformat() + "Z",
+        "per_page": 100,
+    }
+
+
+def _first_page_validators(
+    full_repo: str,
+    username: str,
+    start: datetime,
+    end: datetime,
+    roles: Sequence[str],
+) -> Optional[List]:
+    """Return ``[url, params, etag]`` for the first page each role was read from.
+
+    A new or removed commit changes the search's total_count and the top of
+    the newest-first commit list, so these pages stand in for the whole
+    result. ``None`` if any role's first page came without an ETag.
+    """
+    validators = []
+    for role in roles:
+        candidates = [
+            (
+                SEARCH_URL,
+                {**_search_params(full_repo, username, role, start, end), "page": 1},
+            ),
+            (
+                f"https://api.github.com/repos/{full_repo}/commits",
+                _commits_params(username, role, start, end),
+            ),
+        ]
+        for url, params in candidates:
+            cached = _etag_lookup((url, tuple(sorted(params.items()))))
+            if cached is not None:
+                validators.append([url, params, cached[0]])
+                break
+        else:
+            return None
+    return validators
+
+
+def _unchanged(
+    session: requests.Session, validators: List, headers: Optional[Dict]
+) -> bool:
+    """Revalidate cached first pages; ``True`` if every one comes back 304."""
+    # requests-cache revalidates expired responses itself and hands back its
+    # stored 200 in place of the server's 304, so bypass it here.
+    bypass = (
+        session.cache_disabled()
+        if _is_cached_session(session)
+        else contextlib.nullcontext()
+    )
+    with bypass:
+        for url, params, etag in validators:
+            extra = SEARCH_ACCEPT if url == SEARCH_URL else {}
+            _respect_rate_limit(_rate_limit_resource(url))
+            resp = session.get(
+                url,
+                headers={**(headers or {}), **extra, "If-None-Match": etag},
+                params=params,
+            )
+            _record_rate_limit(resp)
+            if resp.status_code != 304:
+                return False
+    return True
+
+
+def _last_page(links: Dict) -> int:
+    last = links.get("last")
+    if last is None:
+        return 1
+    page = parse_qs(urlparse(last["url"]).query).get("page", ["1"])[0]
+    # An unparseable link falls back to following rel="next" sequentially.
+    return int(page) if page.isdigit() else 1
+
+
+def _get_pages(
+    session: requests.Session,
+    url: str,
+    params: Dict[str, Any],
+    pages: range,
+    headers: Optional[Dict],
+    end: datetime,
+) -> List[Tuple[requests.Response, Any, Dict]]:
+    """Fetch the given page numbers of ``url`` concurrently, in page order."""
+    if not pages:
+        return []
+    with ThreadPoolExecutor(min(len(pages), PAGE_WORKERS)) as ex:
+        return list(
+            ex.map(
+                lambda page: _get_json(
+                    session, url, {**params, "page": page}, headers, end
+                ),
+                pages,
+            )
+        )
+
+
+def _follow_next(
+    session: requests.Session,
+    resp: requests.Response,
+    data: Any,
+    links: Dict,
+    headers: Optional[Dict],
+    end: datetime,
+) -> Iterator[Tuple[requests.Response, Any]]:
+    """Yield each page's ``(resp, data)``, following rel="next" links.
+
+    The next page is requested before the current one is yielded, so the
+    caller's parsing overlaps with the round-trip for the page after it.
+    """
+    with ThreadPoolExecutor(1) as ex:
+        while True:
+            # GitHub omits rel="next" on the last page, which saves requesting
+            # an empty page; the next URL already carries every query parameter.
+            pending = None
+            if data and "next" in links:
+                pending = ex.submit(
+                    _get_json, session, links["next"]["url"], {}, headers, end
+                )
+            yield resp, data
+            if pending is None:
+                return
+            resp, data, links = pending.result()
+
+
+def _new_commit_dates(commits: List[Dict], seen_shas: Set[str]) -> np.ndarray:
+    """Return the author dates of ``commits`` whose SHA is not yet seen.
+
+    Page-numbered listings shift when commits land mid-fetch, so the same
+    commit can show up on two pages; duplicates are dropped by SHA before any
+    date is parsed. REST dates are UTC ("Z") but search results carry the
+    committer's offset, so the page is parsed in one go and normalised to
+    naive UTC; malformed dates become NaT and are dropped.
+    """
+    dates = []
+    for c in commits:
+        # Entries without a usable author date are skipped up front rather
+        # than failing the page with a KeyError/TypeError.
+        if not isinstance(c, dict):
+            continue
+        date_str = ((c.get("commit") or {}).get("author") or {}).get("date")
+        if not isinstance(date_str, str):
+            continue
+        sha = c.get("sha")
+        if sha is not None:
+            if sha in seen_shas:
+                continue
+            seen_shas.add(sha)
+        dates.append(date_str)
+    if not dates:
+        return np.array([], dtype="datetime64[s]")
+    parsed = pd.to_datetime(dates, format="ISO8601", utc=True, errors="coerce")
+    return parsed.dropna().tz_localize(None).to_numpy("datetime64[s]")
+
+
+def _concat_dates(arrays: List[np.ndarray]) -> np.ndarray:
+    if not arrays:
+        return np.array([], dtype="datetime64[s]")
+    return np.concatenate(arrays)
+
+
+def _usable_search_page(payload: Any) -> bool:
+    # A search that timed out sets incomplete_results and undercounts, and any
+    # other body can't be trusted either; the caller falls back to REST.
+    return (
+        isinstance(payload, dict)
+        and isinstance(payload.get("total_count"), int)
+        and isinstance(payload.get("items"), list)
+        and not payload.get("incomplete_results")
+    )
+
+
+def _fetch_via_search(
+    full_repo: str,
+    username: str,
+    start: datetime,
+    end: datetime,
+    headers: Optional[Dict],
+    session: requests.Session,
+    seen_shas: Optional[Set[str]] = None,
+    role: str = "author",
+) -> Optional[np.ndarray]:
+    """Fetch commit dates with the Search API, or ``None`` if unavailable.
+
+    The search is filtered server-side, so the common case of fewer than 100
+    matching commits costs a single request. Only the first 1000 hits of a
+    search are reachable, so larger result sets are bisected by date range.
+    """
+    search_headers = {**(headers or {}), **SEARCH_ACCEPT}
+    seen_shas = set() if seen_shas is None else seen_shas
+    params = _search_params(full_repo, username, role, start, end)
+    _, payload, _ = _get_json(
+        session, SEARCH_URL, {**params, "page": 1}, search_headers, end
+    )
+    if not _usable_search_page(payload):
+        return None
+
+    total_count = payload["total_count"]
+    if total_count > SEARCH_RESULT_LIMIT:
+        if start.date() >= end.date():
+            return None
+        mid = start + (end - start) / 2
+        after_mid = datetime.combine(
+            mid.date() + timedelta(days=1), datetime.min.time()
+        )
+        first = _fetch_via_search(
+            full_repo, username, start, mid, headers, session, seen_shas, role
+        )
+        second = _fetch_via_search(
+            full_repo, username, after_mid, end, headers, session, seen_shas, role
+        )
+        if first is None or second is None:
+            return None
+        return np.concatenate([first, second])
+
+    # The total is known from the first page, so the remaining pages can be
+    # requested concurrently.
+    n_pages = -(-total_count // 100)
+    payloads = [payload] + [
+        data
+        for _, data, _ in _get_pages(
+            session, SEARCH_URL, params, range(2, n_pages + 1), search_headers, end
+        )
+    ]
+    if not all(_usable_search_page(p) for p in payloads):
+        return None
+    return _concat_dates([_new_commit_dates(p["items"], seen_shas) for p in payloads])
+
+
+def _fetch_role(
+    full_repo: str,
+    username: str,
+    role: str,
+    start: datetime,
+    end: datetime,
+    headers: Optional[Dict],
+    session: requests.Session,
+    seen_shas: Set[str],
+) -> Tuple[np.ndarray, bool]:
+    """Return one role's commit dates and whether every page was fetched."""
+    # Search works on a copy so a search that fails halfway doesn't hide
+    # commits from the fallback below.
+    search_seen = set(seen_shas)
+    commit_dates = _fetch_via_search(
+        full_repo, username, start, end, headers, session, search_seen, role
+    )
+    if commit_dates is not None:
+        seen_shas.update(search_seen)
+        return commit_dates, True
+
+    # Search is unavailable (e.g. rate limited or repo not indexed): fall back
+    # to paging through the repository's commit list.
+    url = f"https://api.github.com/repos/{full_repo}/commits"
+    params = _commits_params(username, role, start, end)
+    resp, data, links = _get_json(session, url, params, headers, end)
+
+    last_page = _last_page(links)
+    if data and last_page > 1:
+        # Page 1's rel="last" link gives the page count, so the rest can be
+        # requested concurrently instead of one round-trip after another.
+        pages = range(2, last_page + 1)
+        responses = [(resp, data)] + [
+            (resp, data)
+            for resp, data, _ in _get_pages(session, url, params, pages, headers, end)
+        ]
+    else:
+        responses = _follow_next(session, resp, data, links, headers, end)
+
+    page_arrays = []
+    for resp, data in responses:
+        if data is None:
+            print(f"Error fetching {full_repo}: HTTP {resp.status_code}")
+            return _concat_dates(page_arrays), False
+        page_arrays.append(_new_commit_dates(data, seen_shas))
+
+    return _concat_dates(page_arrays), True
+
+
+_CONTRIBUTIONS_QUERY = """
+query($login: String!, $from: DateTime!, $to: DateTime!) {
+  user(login: $login) {
+    contributionsCollection(from: $from, to: $to) {
+      commitContributionsByRepository(maxRepositories: 100) {
+        repository { nameWithOwner }
+        contributions(first: 100) { totalCount nodes { occurredAt commitCount } }
+      }
+    }
+  }
+}
+"""
+
+
+def _fetch_via_graphql(
+    username: str,
+    repos: List[str],
+    start: datetime,
+    end: datetime,
+    headers: Dict,
+    session: requests.Session,
+) -> Dict[str, np.ndarray]:
+    """Fetch per-day commit counts for ``repos`` in a single GraphQL query.
+
+    GitHub aggregates the user's commit contributions server-side, replacing
+    the per-repo REST fan-out. Returns commit dates (one entry per commit, at
+    day resolution) for every repo the answer is complete for; repos missing
+    from the result, e.g. because their contribution list was truncated, are
+    left for the REST path. GraphQL requires a token and at most a one-year
+    range.
+    """
+    if end - start > timedelta(days=365):
+        return {}
+    _respect_rate_limit("graphql")
+    try:
+        resp = session.post(
+            GRAPHQL_URL,
+            headers=headers,
+            json={
+                "query": _CONTRIBUTIONS_QUERY,
+                "variables": {
+                    "login": username,
+                    "from": start.isoformat() + "Z",
+                    "to": end.isoformat() + "Z",
+                },
+            },
+        )
+    except requests.RequestException:
+        return {}
+    _record_rate_limit(resp)
+    if resp.status_code != 200:
+        return {}
+    payload = _response_json(resp)
+    if not isinstance(payload, dict):
+        return {}
+    user = (payload.get("data") or {}).get("user")
+    if payload.get("errors") or user is None:
+        return {}
+
+    by_repo = user["contributionsCollection"]["commitContributionsByRepository"]
+    listed = set()
+    found = {}
+    for entry in by_repo:
+        name = entry["repository"]["nameWithOwner"].lower()
+        listed.add(name)
+        nodes = entry["contributions"]["nodes"]
+        if entry["contributions"]["totalCount"] > len(nodes):
+            continue
+        days = np.array([n["occurredAt"][:10] for n in nodes], dtype="datetime64[s]")
+        found[name] = np.repeat(days, [n["commitCount"] for n in nodes])
+
+    # Only when the repository list wasn't capped does an unlisted repo really
+    # mean "no commits".
+    complete = len(by_repo) < 100
+    result = {}
+    for repo in repos:
+        name = repo.lower()
+        if name in found:
+            result[repo] = found[name]
+        elif complete and name not in listed:
+            result[repo] = _concat_dates([])
+    return result
+
+
+def _count_weekly(
+    commit_dates: np.ndarray, first_monday: pd.Timestamp, n_weeks: int
+) -> np.ndarray:
+    """Count commits per 7-day bucket starting at ``first_monday``."""
+    dts = np.asarray(commit_dates, dtype="datetime64[s]")
+    idx = (dts - first_monday.to_datetime64()) // np.timedelta64(7, "D")
+    mask = (idx >= 0) & (idx < n_weeks)
+    counts = np.bincount(idx[mask].astype(np.intp), minlength=n_weeks)
+    return np.minimum(counts, np.iinfo(COUNT_DTYPE).max).astype(COUNT_DTYPE)
+
+
+@lru_cache(maxsize=4096)
+def _repo_short_name(repo: str) -> str:
+    return repo.rpartition("/")[2]
+
+
+def _frame_cache_path(
+    username: str,
+    repos: List[str],
+    start: datetime,
+    end: datetime,
+    roles: Sequence[str] = ("author",),
+) -> Path:
+    key = f"{username}|{','.join(sorted(repos))}|{start.date()}|{end.date()}"
+    if tuple(roles) != ("author",):
+        key += f"|{','.join(sorted(roles))}"
+    return CACHE_DIR / f"{hashlib.sha1(key.encode()).hexdigest()}.parquet"
+
+
+def _read_cached_frame(path: Path, ttl: int) -> Optional[pd.DataFrame]:
+    try:
+        if time.time() - path.stat().st_mtime >= ttl:
+            return None
+        return pd.read_parquet(path)
+    # missing file, no parquet engine, or a corrupt snapshot (ArrowInvalid)
+    except (OSError, ImportError, ValueError):
+        return None
+
+
+def _write_cached_frame(path: Path, df: pd.DataFrame) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(path)
+    # ValueError: Parquet rejects duplicate column names, e.g. a/x and b/x
+    except (OSError, ImportError, ValueError):
+        pass
 
 
 def fetch_weekly_commits(
@@ -10,7 +767,20 @@ def fetch_weekly_commits(
     start: datetime,
     end: datetime,
     headers: Optional[Dict] = None,
+    session: Optional[requests.Session] = None,
+    cache_ttl: Optional[int] = None,
+    roles: Sequence[str] = ("author",),
 ) -> pd.DataFrame:
+    # Finished date ranges can be served from a Parquet snapshot of an earlier
+    # run; ranges reaching today rely on the shorter-lived per-repo cache.
+    columns = [_repo_short_name(r) for r in repos]
+    cache_path = None
+    if cache_ttl and repos and not _reaches_today(end):
+        cache_path = _frame_cache_path(username, repos, start, end, roles)
+        cached = _read_cached_frame(cache_path, cache_ttl)
+        if cached is not None:
+            return cached[columns]
+
     offset_start = (0 - start.weekday()) % 7
     first_monday = pd.Timestamp(start) + pd.Timedelta(days=offset_start)
 
@@ -18,45 +788,61 @@ def fetch_weekly_commits(
     last_monday = pd.Timestamp(end) + pd.Timedelta(days=offset_end)
 
     weeks = pd.date_range(start=first_monday, end=last_monday, freq="7D")
-    df = pd.DataFrame(0, index=weeks, columns=[r.split("/")[-1] for r in repos])
-
-    for full_repo in repos:
-        short_name = full_repo.split("/")[-1]
-        commit_dates = []
-        page = 1
-
-        while True:
-            resp = requests.get(
-                f"https://api.github.com/repos/{full_repo}/commits",
-                headers=headers,
-                params={
-                    "author": username,
-                    "since": start.isoformat() + "Z",
-                    "until": end.isoformat() + "Z",
-                    "per_page": 100,
-                    "page": page,
-                },
-            )
-            if resp.status_code != 200:
-                print(f"Error fetching {full_repo}: HTTP {resp.status_code}")
-                break
-
-            data = resp.json()
-            if not data:
-                break
+    # Fill one preallocated column-major block and wrap it once, rather than
+    # assigning DataFrame columns repo by repo.
+    counts = np.zeros((len(weeks), len(repos)), dtype=COUNT_DTYPE, order="F")
 
-            for c in data:
-                dt = datetime.fromisoformat(
-                    c["commit"]["author"]["date"].replace("Z", "+00:00")
-                ).replace(tzinfo=None)
-                commit_dates.append(dt)
+    session = session or _SESSION
+    resolved = {}
+    if repos and headers and "Authorization" in headers and tuple(roles) == ("author",):
+        # With a token, a single GraphQL query usually answers every repo;
+        # contributions only cover authored commits.
+        resolved = _fetch_via_graphql(username, repos, start, end, headers, session)
+    for i, r in enumerate(repos):
+        # Columns start at zero, so repos without commits need no binning.
+        if len(resolved.get(r, ())):
+            counts[:, i] = _count_weekly(resolved[r], first_monday, len(weeks))
 
-            page += 1
+    pending = [i for i, r in enumerate(repos) if r not in resolved]
+    # Like the per-repo cache, the snapshot is only written when every repo was
+    # fetched completely, so a rate-limited run isn't cached as zero commits.
+    complete = True
+    if pending:
+        # Each remaining repo is an independent, network-bound fetch: overlap
+        # the round-trips on the shared session so connections are reused
+        # across threads.
+        with ThreadPoolExecutor(min(len(pending), MAX_WORKERS)) as ex:
+            futures = {
+                ex.submit(
+                    _fetch_commits_for_repo,
+                    repos[i],
+                    username,
+                    start,
+                    end,
+                    headers,
+                    session,
+                    roles,
+                    cache_ttl,
+                ): i
+                for i in pending
+            }
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    commit_dates, repo_complete = future.result()
+                except Exception as e:
+                    # One repo failing, over the network or on an unexpected
+                    # payload, leaves its column at zero instead of losing
+                    # the repos that did succeed.
+                    print(f"Error fetching {repos[i]}: {e}")
+                    complete = False
+                    continue
 
-        if commit_dates:
-            s = pd.Series(1, index=pd.to_datetime(commit_dates))
-            weekly = s.resample("W-MON", label="left", closed="left").sum()
-            weekly = weekly.reindex(weeks, fill_value=0)
-            df[short_name] = weekly
+                complete = complete and repo_complete
+                if len(commit_dates):
+                    counts[:, i] = _count_weekly(commit_dates, first_monday, len(weeks))
 
+    df = pd.DataFrame(counts, index=weeks, columns=columns, copy=False)
+    if cache_path is not None and complete:
+        _write_cached_frame(cache_path, df)
     return df
@@ -0,0 +1,72 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+
+def _has_display() -> bool:
+    if not sys.platform.startswith("linux"):
+        return True
+    return bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+
+def _label_bars(ax) -> None:
+    """Write each stacked segment's count at its centre.
+
+    Geometry is gathered in one pass and labels are only created for segments
+    taller than 2% of the tallest one; smaller ones are unreadable anyway and
+    each label is a separate artist matplotlib has to lay out.
+    """
+    if not ax.patches:
+        return
+    x, y, w, h = np.array(
+        [(p.get_x(), p.get_y(), p.get_width(), p.get_height()) for p in ax.patches]
+    ).T
+    mask = h > max(h.max() * 0.02, 0)
+    xs = x[mask] + w[mask] / 2
+    ys = y[mask] + h[mask] / 2
+    for xi, yi, hi in zip(xs, ys, h[mask]):
+        ax.text(xi, yi, int(hi), ha="center", va="center", fontsize=8, color="white")
+
+
+def create_weekly_commits_plot(
+    df: pd.DataFrame,
+    username: str,
+    output_file: str = "weekly_commits.png",
+    show_plot: bool = True,
+) -> Figure:
+    """Draw ``df`` as a stacked weekly bar chart and save it to ``output_file``.
+
+    The figure is returned for further inspection or saving; it is never left
+    open in pyplot, so repeated calls don't accumulate state.
+    """
+    if show_plot and _has_display():
+        import matplotlib.pyplot as plt
+
+        fig, ax = plt.subplots(figsize=(14, 6))
+    else:
+        # Nothing will be shown: draw on a standalone Agg-backed figure rather
+        # than switching the process-wide backend, which would close the
+        # caller's own figures (e.g. in a notebook).
+        plt = None
+        fig = Figure(figsize=(14, 6))
+        FigureCanvasAgg(fig)
+        ax = fig.subplots()
+
+    df.plot(kind="bar", stacked=True, ax=ax, colormap="tab20", width=0.8)
+    for patch in ax.patches:
+        patch.set_rasterized(True)
+    _label_bars(ax)
+    ax.set_xticklabels(df.index.strftime("%Y-%m-%d").tolist(), rotation=45, ha="right")
+    ax.set_title(f"Weekly GitHub Contributions by Repo ({username})")
+    ax.set_xlabel("Start of the week (Monday)")
+    ax.set_ylabel("Merged Commits")
+    fig.tight_layout()
+    fig.savefig(output_file, dpi=300)
+    if plt is not None:
+        plt.show()
+        plt.close(fig)
+    return fig
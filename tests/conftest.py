@@ -0,0 +1,45 @@
+import pandas as pd
+import pytest
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _warm_imports():
+    # Pay the heavy import cost once up front instead of in whichever test
+    # happens to run first, and keep every plot on the non-interactive backend.
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import ghweekly.cli  # noqa: F401
+    import ghweekly.main  # noqa: F401
+    import ghweekly.plotting  # noqa: F401
+
+
+@pytest.fixture(scope="session")
+def parser():
+    # argparse parsers are not mutated by parse_args, so one can be shared
+    from ghweekly.cli import create_parser
+
+    return create_parser()
+
+
+@pytest.fixture
+def weekly_df():
+    weeks = pd.date_range("2025-01-06", periods=3, freq="7D")
+    return pd.DataFrame({"repo1": [1, 0, 2]}, index=weeks)
+
+
+@pytest.fixture
+def fake_fetch(monkeypatch, weekly_df):
+    """Serve ``weekly_df`` to the CLI instead of calling the GitHub API.
+
+    Returns the list of keyword arguments each fetch was called with.
+    """
+    calls = []
+
+    def fetch_weekly_commits(**kwargs):
+        calls.append(kwargs)
+        return weekly_df
+
+    monkeypatch.setattr("ghweekly.main.fetch_weekly_commits", fetch_weekly_commits)
+    monkeypatch.setattr("ghweekly.main.create_session", lambda cache_ttl=None: None)
+    return calls
@@ -1,7 +1,25 @@
+import json
+from collections import OrderedDict
+import os
+import threading
 import pytest
+import requests
+import numpy as np
 import pandas as pd
 from datetime import datetime
-from ghweekly.main import fetch_weekly_commits
+from ghweekly.main import (
+    _SESSION,
+    _cache_options,
+    _count_weekly,
+    _etag_lookup,
+    _etag_store,
+    _last_page,
+    _new_commit_dates,
+    _respect_rate_limit,
+    create_session,
+    fetch_commits_for_repo,
+    fetch_weekly_commits,
+)
 
 
 @pytest.fixture
@@ -16,9 +34,14 @@ def mock_data():
 
 
 class MockResponse:
-    def __init__(self, status_code=200, json_data=None):
+    __slots__ = ("status_code", "_json_data", "headers", "links", "content")
+
+    def __init__(self, status_code=200, json_data=None, headers=None, links=None):
         self.status_code = status_code
         self._json_data = json_data or []
+        self.headers = headers or {}
+        self.links = links or {}
+        self.content = json.dumps(self._json_data).encode()
 
     def json(self):
         return self._json_data
@@ -47,14 +70,15 @@ def test_fetch_weekly_commits(mock_data):
     assert isinstance(df, pd.DataFrame)
     assert list(df.columns) == ["repo1", "repo2"]
     assert isinstance(df.index, pd.DatetimeIndex)
-    assert df.applymap(lambda x: isinstance(x, (int, float))).all().all()
+    assert all(pd.api.types.is_numeric_dtype(t) for t in df.dtypes)
+    assert (df.dtypes == np.uint16).all()
 
 
 def test_fetch_weekly_commits_error(monkeypatch):
     def mock_get(*args, **kwargs):
         return MockResponse(status_code=403)
 
-    monkeypatch.setattr("requests.get", mock_get)
+    monkeypatch.setattr("requests.Session.get", mock_get)
     df = fetch_weekly_commits(
         "user", ["org/repo"], datetime(2025, 1, 1), datetime(2025, 2, 1), {}
     )
@@ -62,13 +86,732 @@ def test_fetch_weekly_commits_error(monkeypatch):
     assert (df == 0).all().all()
 
 
+def search_payload(items):
+    return {"total_count": len(items), "items": items}
+
+
 def test_fetch_weekly_commits_no_commits(monkeypatch):
-    def mock_get(*args, **kwargs):
+    def mock_get(self, url, **kwargs):
+        if "search" in url:
+            return MockResponse(json_data=search_payload([]))
         return MockResponse(status_code=200, json_data=[])
 
-    monkeypatch.setattr("requests.get", mock_get)
+    monkeypatch.setattr("requests.Session.get", mock_get)
     df = fetch_weekly_commits(
         "user", ["org/repo"], datetime(2025, 1, 1), datetime(2025, 2, 1), {}
     )
     assert isinstance(df, pd.DataFrame)
     assert (df == 0).all().all()
+
+
+def test_fetch_weekly_commits_parallel(monkeypatch):
+    def mock_get(self, url, **kwargs):
+        items = []
+        if "repo:org/repo1" in kwargs["params"]["q"]:
+            items = [{"commit": {"author": {"date": "2025-01-07T10:00:00Z"}}}]
+        return MockResponse(json_data=search_payload(items))
+
+    monkeypatch.setattr("requests.Session.get", mock_get)
+    df = fetch_weekly_commits(
+        "user",
+        ["org/repo1", "org/repo2"],
+        datetime(2025, 1, 6),
+        datetime(2025, 2, 1),
+        {},
+    )
+    assert list(df.columns) == ["repo1", "repo2"]
+    assert df["repo1"].sum() == 1
+    assert df.loc["2025-01-06", "repo1"] == 1
+    assert df["repo2"].sum() == 0
+
+
+def test_fetch_weekly_commits_mixed_results(monkeypatch, capsys):
+    def mock_get(self, url, **kwargs):
+        q = kwargs["params"]["q"]
+        if "repo:org/repo2" in q:
+            raise requests.ConnectionError("connection reset")
+        if "repo:org/repo3" in q:
+            raise RuntimeError("unexpected payload")
+        item = {"commit": {"author": {"date": "2025-01-07T10:00:00Z"}}}
+        return MockResponse(json_data=search_payload([item]))
+
+    monkeypatch.setattr("requests.Session.get", mock_get)
+    df = fetch_weekly_commits(
+        "user",
+        ["org/repo1", "org/repo2", "org/repo3"],
+        datetime(2025, 1, 6),
+        datetime(2025, 2, 1),
+        {},
+    )
+    assert df["repo1"].sum() == 1
+    assert df["repo2"].sum() == 0
+    assert df["repo3"].sum() == 0
+    out = capsys.readouterr().out
+    assert "Error fetching org/repo2: connection reset" in out
+    assert "Error fetching org/repo3: unexpected payload" in out
+
+
+def test_fetch_weekly_commits_deduplication(monkeypatch):
+    def mock_get(self, url, **kwargs):
+        item = {
+            "sha": "commit123",
+            "commit": {"author": {"date": "2025-01-07T10:00:00Z"}},
+        }
+        return MockResponse(json_data=search_payload([item]))
+
+    monkeypatch.setattr("requests.Session.get", mock_get)
+    df = fetch_weekly_commits(
+        "user",
+        ["org/repo1"],
+        datetime(2025, 1, 6),
+        datetime(2025, 2, 1),
+        {},
+        roles=("author", "committer"),
+    )
+    assert df["repo1"].sum() == 1
+
+
+def test_session_pools_and_retries():
+    adapter = _SESSION.get_adapter("https://api.github.com")
+    assert adapter._pool_maxsize == 32
+    assert adapter.max_retries.total == 3
+    assert 503 in adapter.max_retries.status_forcelist
+    assert 429 in adapter.max_retries.status_forcelist
+    assert getattr(adapter.max_retries, "backoff_jitter", 0.5) == 0.5
+
+
+def test_fetch_commits_for_repo_search_bisects_large_ranges():
+    calls = []
+
+    class Session:
+        def get(self, url, **kwargs):
+            q = kwargs["params"]["q"]
+            calls.append(q)
+            if q.endswith("2025-01-01..2025-02-01"):
+                return MockResponse(json_data={"total_count": 1500, "items": []})
+            date = q.rsplit(":", 1)[1][:10]
+            item = {"commit": {"author": {"date": f"{date}T12:00:00.000-08:00"}}}
+            return MockResponse(json_data=search_payload([item]))
+
+    dates = fetch_commits_for_repo(
+        "org/repo", "user", datetime(2025, 1, 1), datetime(2025, 2, 1), {}, Session()
+    )
+    assert calls[1].endswith("2025-01-01..2025-01-16")
+    assert calls[2].endswith("2025-01-17..2025-02-01")
+    # search dates carry an offset and are normalised to UTC
+    assert dates.tolist() == [datetime(2025, 1, 1, 20), datetime(2025, 1, 17, 20)]
+
+
+def test_new_commit_dates_normalises_offsets_to_utc():
+    def commit(date):
+        return {"commit": {"author": {"date": date}}}
+
+    from_search = _new_commit_dates([commit("2025-01-12T23:30:00.000-08:00")], set())
+    from_rest = _new_commit_dates([commit("2025-01-13T07:30:00Z")], set())
+    assert from_search.tolist() == from_rest.tolist() == [datetime(2025, 1, 13, 7, 30)]
+
+
+def test_fetch_commits_for_repo_falls_back_to_commit_list():
+    class Session:
+        def get(self, url, **kwargs):
+            if "search" in url:
+                return MockResponse(status_code=422)
+            item = {"commit": {"author": {"date": "2025-01-07T10:00:00Z"}}}
+            return MockResponse(json_data=[item])
+
+    dates = fetch_commits_for_repo(
+        "org/repo", "user", datetime(2025, 1, 1), datetime(2025, 2, 1), {}, Session()
+    )
+    assert dates.tolist() == [datetime(2025, 1, 7, 10)]
+
+
+@pytest.mark.parametrize(
+    "first_page, second_page",
+    [
+        ([], None),
+        ({"message": "Validation Failed"}, None),
+        ({"total_count": 1}, None),
+        ({"total_count": 1, "items": None}, None),
+        ({**search_payload([{}]), "incomplete_results": True}, None),
+        (
+            {"total_count": 101, "items": []},
+            {"total_count": 101, "items": [], "incomplete_results": True},
+        ),
+    ],
+)
+def test_fetch_commits_for_repo_falls_back_on_unusable_search(first_page, second_page):
+    class Session:
+        def get(self, url, params=None, **kwargs):
+            if "search" in url:
+                page = first_page if params["page"] == 1 else second_page
+                return MockResponse(json_data=page)
+            item = {"commit": {"author": {"date": "2025-01-07T10:00:00Z"}}}
+            return MockResponse(json_data=[item])
+
+    dates = fetch_commits_for_repo(
+        "org/repo", "user", datetime(2025, 1, 1), datetime(2025, 2, 1), {}, Session()
+    )
+    assert dates.tolist() == [datetime(2025, 1, 7, 10)]
+
+
+def test_fetch_commits_for_repo_malformed_commit_data():
+    items = [
+        {"commit": {"author": {"date": "2025-01-07T10:00:00Z"}}},
+        {"commit": {"author": {"date": "invalid-date"}}},
+        {"commit": {"author": {"date": None}}},
+        {"commit": {"author": None}},
+        {"commit": {}},
+        {"sha": "abc"},
+        "not-a-commit",
+    ]
+
+    class Session:
+        def get(self, url, **kwargs):
+            return MockResponse(json_data=search_payload(items))
+
+    dates = fetch_commits_for_repo(
+        "org/repo", "user", datetime(2025, 1, 1), datetime(2025, 2, 1), {}, Session()
+    )
+    assert dates.dtype == "datetime64[s]"
+    assert dates.tolist() == [datetime(2025, 1, 7, 10)]
+
+
+def test_fetch_commits_for_repo_invalid_json_response(capsys):
+    class Session:
+        def get(self, url, **kwargs):
+            resp = MockResponse()
+            resp.content = b"<html>Bad gateway</html>"
+            return resp
+
+    dates = fetch_commits_for_repo(
+        "org/repo", "user", datetime(2025, 1, 1), datetime(2025, 2, 1), {}, Session()
+    )
+    assert len(dates) == 0
+    assert "Error fetching org/repo: HTTP 200" in capsys.readouterr().out
+
+
+def test_count_weekly_buckets_and_drops_out_of_range():
+    first_monday = pd.Timestamp("2025-01-06")
+    dates = [
+        datetime(2025, 1, 5, 23),  # before the first week
+        datetime(2025, 1, 6),
+        datetime(2025, 1, 12, 23, 59),
+        datetime(2025, 1, 13),
+        datetime(2025, 1, 27),  # past the last week
+    ]
+    counts = _count_weekly(dates, first_monday, 3)
+    assert counts.tolist() == [2, 1, 0]
+    assert counts.dtype == np.uint16
+
+
+def test_count_weekly_saturates_instead_of_wrapping():
+    dates = np.full(70_000, np.datetime64("2025-01-07T10:00:00"))
+    counts = _count_weekly(dates, pd.Timestamp("2025-01-06"), 1)
+    assert counts.tolist() == [65535]
+
+
+def test_create_session_with_cache(monkeypatch, tmp_path):
+    requests_cache = pytest.importorskip("requests_cache")
+    monkeypatch.setattr("ghweekly.main.CACHE_DIR", tmp_path)
+    session = create_session(cache_ttl=600)
+    assert isinstance(session, requests_cache.CachedSession)
+    assert session.settings.expire_after == 600
+    assert _cache_options(session, datetime.now()) == {"expire_after": 60}
+    assert _cache_options(session, datetime(2025, 1, 1)) == {}
+    assert _cache_options(create_session(), datetime.now()) == {}
+
+
+def test_fetch_commits_for_repo_revalidates_with_etag(monkeypatch):
+    monkeypatch.setattr("ghweekly.main._ETAG_CACHE", OrderedDict())
+    item = {"commit": {"author": {"date": "2025-01-07T10:00:00Z"}}}
+    sent = []
+
+    class Session:
+        def get(self, url, headers=None, **kwargs):
+            sent.append(headers.get("If-None-Match"))
+            if headers.get("If-None-Match") == '"abc"':
+                return MockResponse(status_code=304)
+            return MockResponse(
+                json_data=search_payload([item]), headers={"ETag": '"abc"'}
+            )
+
+    args = ("org/repo", "user", datetime(2025, 1, 1), datetime(2025, 2, 1), {})
+    first = fetch_commits_for_repo(*args, Session())
+    second = fetch_commits_for_repo(*args, Session())
+    assert sent == [None, '"abc"']
+    assert first.tolist() == second.tolist() == [datetime(2025, 1, 7, 10)]
+
+
+def test_etag_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr("ghweekly.main._ETAG_CACHE", OrderedDict())
+    monkeypatch.setattr("ghweekly.main.ETAG_CACHE_SIZE", 2)
+    _etag_store(("a", ()), ('"a"', [], {}))
+    _etag_store(("b", ()), ('"b"', [], {}))
+    assert _etag_lookup(("a", ())) is not None  # "a" is now most recent
+    _etag_store(("c", ()), ('"c"', [], {}))
+    assert _etag_lookup(("b", ())) is None
+    assert _etag_lookup(("a", ())) is not None
+    assert _etag_lookup(("c", ())) is not None
+
+
+def test_fetch_commits_for_repo_skips_commits_repeated_across_pages():
+    def commit(sha, date):
+        return {"sha": sha, "commit": {"author": {"date": date}}}
+
+    page_2 = "https://api.github.com/repositories/1/commits?page=2"
+    pages = {
+        "https://api.github.com/repos/org/repo/commits": MockResponse(
+            json_data=[
+                commit("a", "2025-01-07T10:00:00Z"),
+                commit("b", "2025-01-08T10:00:00Z"),
+            ],
+            links={"next": {"url": page_2}},
+        ),
+        # a new commit landed between requests and pushed "b" onto page 2
+        page_2: MockResponse(
+            json_data=[
+                commit("b", "2025-01-08T10:00:00Z"),
+                commit("c", "2025-01-20T10:00:00Z"),
+            ]
+        ),
+    }
+    requested = []
+
+    class Session:
+        def get(self, url, **kwargs):
+            if "search" in url:
+                return MockResponse(status_code=403)
+            requested.append(url)
+            return pages[url]
+
+    dates = fetch_commits_for_repo(
+        "org/repo", "user", datetime(2025, 1, 1), datetime(2025, 2, 1), {}, Session()
+    )
+    assert requested == list(pages)
+    assert dates.tolist() == [
+        datetime(2025, 1, 7, 10),
+        datetime(2025, 1, 8, 10),
+        datetime(2025, 1, 20, 10),
+    ]
+
+
+def test_fetch_commits_for_repo_prefetches_next_page(monkeypatch):
+    page_2 = "https://api.github.com/repositories/1/commits?page=2"
+    page_2_requested = threading.Event()
+    overlapped = []
+
+    class Session:
+        def get(self, url, **kwargs):
+            if "search" in url:
+                return MockResponse(status_code=403)
+            if url == page_2:
+                page_2_requested.set()
+                item = {"commit": {"author": {"date": "2025-01-20T10:00:00Z"}}}
+                return MockResponse(json_data=[item])
+            item = {"commit": {"author": {"date": "2025-01-07T10:00:00Z"}}}
+            return MockResponse(json_data=[item], links={"next": {"url": page_2}})
+
+    def slow_parse(commits, seen_shas):
+        # Page 2 must already be on its way while page 1 is being parsed.
+        if not overlapped:
+            overlapped.append(page_2_requested.wait(timeout=5))
+        return _new_commit_dates(commits, seen_shas)
+
+    monkeypatch.setattr("ghweekly.main._new_commit_dates", slow_parse)
+    dates = fetch_commits_for_repo(
+        "org/repo", "user", datetime(2025, 1, 1), datetime(2025, 2, 1), {}, Session()
+    )
+    assert overlapped == [True]
+    assert dates.tolist() == [datetime(2025, 1, 7, 10), datetime(2025, 1, 20, 10)]
+
+
+@pytest.mark.parametrize(
+    "remaining, expected_sleeps",
+    [("4999", []), ("5", []), ("4", [25.0]), ("0", [100.0])],
+)
+def test_fetch_commits_for_repo_paces_near_rate_limit(
+    monkeypatch, remaining, expected_sleeps
+):
+    sleeps = []
+    monkeypatch.setattr("ghweekly.main._RATE_LIMITS", {})
+    monkeypatch.setattr("ghweekly.main.time.time", lambda: 1000.0)
+    monkeypatch.setattr("ghweekly.main.time.sleep", sleeps.append)
+    headers = {
+        "X-RateLimit-Remaining": remaining,
+        "X-RateLimit-Reset": "1100",
+        "X-RateLimit-Resource": "search",
+    }
+
+    class Session:
+        def get(self, url, **kwargs):
+            # two pages: the budget left after page 1 paces page 2
+            payload = {"total_count": 101, "items": []}
+            return MockResponse(json_data=payload, headers=headers)
+
+    fetch_commits_for_repo(
+        "org/repo", "user", datetime(2025, 1, 1), datetime(2025, 2, 1), {}, Session()
+    )
+    assert sleeps == expected_sleeps
+
+
+def test_rate_limit_budget_is_shared_across_workers(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("ghweekly.main._RATE_LIMITS", {"search": (2, 1100)})
+    monkeypatch.setattr("ghweekly.main.time.time", lambda: 1000.0)
+    monkeypatch.setattr("ghweekly.main.time.sleep", sleeps.append)
+
+    for _ in range(3):
+        _respect_rate_limit("search")
+    _respect_rate_limit("core")
+    assert sleeps == [50.0, 100.0, 100.0]
+
+
+def test_rate_limit_wait_is_announced(monkeypatch, capsys):
+    monkeypatch.setattr("ghweekly.main._RATE_LIMITS", {"core": (0, 4600)})
+    monkeypatch.setattr("ghweekly.main.time.time", lambda: 1000.0)
+    monkeypatch.setattr("ghweekly.main.time.sleep", lambda seconds: None)
+
+    _respect_rate_limit("core")
+    out = capsys.readouterr().out
+    assert "waiting 3600s" in out
+    assert "--token" in out
+
+    monkeypatch.setattr("ghweekly.main._RATE_LIMITS", {"core": (4, 1004)})
+    _respect_rate_limit("core")
+    assert capsys.readouterr().out == ""
+
+
+def test_fetch_weekly_commits_reuses_cached_frame(monkeypatch, tmp_path):
+    pytest.importorskip("pyarrow")
+    monkeypatch.setattr("ghweekly.main.CACHE_DIR", tmp_path)
+    calls = []
+
+    def mock_get(self, url, **kwargs):
+        calls.append(url)
+        item = {"commit": {"author": {"date": "2025-01-07T10:00:00Z"}}}
+        return MockResponse(json_data=search_payload([item]))
+
+    monkeypatch.setattr("requests.Session.get", mock_get)
+    args = ("user", ["org/repo1", "org/repo2"], datetime(2025, 1, 6))
+    first = fetch_weekly_commits(*args, datetime(2025, 2, 1), cache_ttl=600)
+    assert len(calls) == 2
+    assert len(list(tmp_path.glob("*.parquet"))) == 1
+
+    second = fetch_weekly_commits(*args, datetime(2025, 2, 1), cache_ttl=600)
+    assert len(calls) == 2
+    pd.testing.assert_frame_equal(first, second, check_freq=False)
+
+    reordered = fetch_weekly_commits(
+        "user",
+        ["org/repo2", "org/repo1"],
+        datetime(2025, 1, 6),
+        datetime(2025, 2, 1),
+        cache_ttl=600,
+    )
+    assert len(calls) == 2
+    assert list(reordered.columns) == ["repo2", "repo1"]
+
+    fetch_weekly_commits(*args, datetime(2025, 2, 1))
+    assert len(calls) == 4
+
+
+def test_fetch_commits_for_repo_caches_complete_results(monkeypatch, tmp_path):
+    monkeypatch.setattr("ghweekly.main.CACHE_DIR", tmp_path)
+    calls = []
+    status = {"code": 403}
+
+    class Session:
+        def get(self, url, **kwargs):
+            calls.append(url)
+            if "search" in url:
+                return MockResponse(status_code=422)
+            if status["code"] != 200:
+                return MockResponse(status_code=status["code"])
+            item = {"commit": {"author": {"date": "2025-01-07T10:00:00Z"}}}
+            return MockResponse(json_data=[item])
+
+    args = ("org/repo", "user", datetime(2025, 1, 1), datetime(2025, 2, 1), {})
+    # a failed fetch is not cached
+    assert len(fetch_commits_for_repo(*args, Session(), cache_ttl=600)) == 0
+    assert not list(tmp_path.glob("commits/*.npz"))
+
+    status["code"] = 200
+    first = fetch_commits_for_repo(*args, Session(), cache_ttl=600)
+    assert len(calls) == 4
+    assert len(list(tmp_path.glob("commits/*.npz"))) == 1
+
+    second = fetch_commits_for_repo(*args, Session(), cache_ttl=600)
+    assert len(calls) == 4
+    assert second.tolist() == first.tolist() == [datetime(2025, 1, 7, 10)]
+
+    fetch_commits_for_repo(*args, Session())
+    assert len(calls) == 6
+
+
+def test_fetch_commits_for_repo_ignores_truncated_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr("ghweekly.main.CACHE_DIR", tmp_path)
+
+    class Session:
+        def get(self, url, **kwargs):
+            item = {"commit": {"author": {"date": "2025-01-07T10:00:00Z"}}}
+            return MockResponse(json_data=search_payload([item]))
+
+    args = ("org/repo", "user", datetime(2025, 1, 1), datetime(2025, 2, 1), {})
+    fetch_commits_for_repo(*args, Session(), cache_ttl=3600)
+    (path,) = tmp_path.glob("commits/*")
+    path.write_bytes(path.read_bytes()[:100])
+
+    dates = fetch_commits_for_repo(*args, Session(), cache_ttl=3600)
+    assert dates.tolist() == [datetime(2025, 1, 7, 10)]
+    # the refetch replaced the truncated file and left no temp file behind
+    assert list(tmp_path.glob("commits/*")) == [path]
+    assert len(fetch_commits_for_repo(*args, Session(), cache_ttl=3600)) == 1
+
+
+def test_fetch_commits_for_repo_revalidates_stale_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr("ghweekly.main.CACHE_DIR", tmp_path)
+    monkeypatch.setattr("ghweekly.main._ETAG_CACHE", OrderedDict())
+    sent = []
+
+    class Session:
+        def get(self, url, headers=None, **kwargs):
+            sent.append(headers.get("If-None-Match"))
+            if headers.get("If-None-Match") == '"v1"':
+                return MockResponse(status_code=304)
+            item = {"commit": {"author": {"date": "2025-01-07T10:00:00Z"}}}
+            return MockResponse(
+                json_data=search_payload([item]), headers={"ETag": '"v1"'}
+            )
+
+    args = ("org/repo", "user", datetime(2025, 1, 1), datetime(2025, 2, 1), {})
+    first = fetch_commits_for_repo(*args, Session(), cache_ttl=600)
+    (path,) = tmp_path.glob("commits/*.npz")
+    os.utime(path, (0, 0))
+
+    second = fetch_commits_for_repo(*args, Session(), cache_ttl=600)
+    assert sent == [None, '"v1"']
+    assert second.tolist() == first.tolist() == [datetime(2025, 1, 7, 10)]
+    assert path.stat().st_mtime > 0
+
+
+def test_fetch_commits_for_repo_revalidates_through_requests_cache(
+    monkeypatch, tmp_path
+):
+    requests_cache = pytest.importorskip("requests_cache")
+    from io import BytesIO
+    from requests.adapters import HTTPAdapter
+    from urllib3.response import HTTPResponse
+
+    monkeypatch.setattr("ghweekly.main.CACHE_DIR", tmp_path)
+    monkeypatch.setattr("ghweekly.main._ETAG_CACHE", OrderedDict())
+    sent = []
+
+    class GitHub(HTTPAdapter):
+        def send(self, request, **kwargs):
+            sent.append(request.headers.get("If-None-Match"))
+            if request.headers.get("If-None-Match") == '"v1"':
+                raw = HTTPResponse(body=BytesIO(b""), status=304, preload_content=False)
+            else:
+                item = {"commit": {"author": {"date": "2025-01-07T10:00:00Z"}}}
+                raw = HTTPResponse(
+                    body=BytesIO(json.dumps(search_payload([item])).encode()),
+                    headers={"ETag": '"v1"', "Content-Type": "application/json"},
+                    status=200,
+                    preload_content=False,
+                )
+            return self.build_response(request, raw)
+
+    # expire_after=0 makes requests-cache revalidate its stored response on
+    # every request, as it does once a longer TTL has passed.
+    session = requests_cache.CachedSession(backend="memory", expire_after=0)
+    session.mount("https://", GitHub())
+    args = ("org/repo", "user", datetime(2025, 1, 1), datetime(2025, 2, 1), {})
+    first = fetch_commits_for_repo(*args, session, cache_ttl=600)
+    (path,) = tmp_path.glob("commits/*.npz")
+    os.utime(path, (0, 0))
+
+    second = fetch_commits_for_repo(*args, session, cache_ttl=600)
+    assert sent == [None, '"v1"']
+    assert second.tolist() == first.tolist() == [datetime(2025, 1, 7, 10)]
+    assert path.stat().st_mtime > 0
+    assert not session.settings.disabled
+
+
+def test_fetch_weekly_commits_tolerates_unwritable_or_corrupt_snapshot(
+    monkeypatch, tmp_path
+):
+    pytest.importorskip("pyarrow")
+    monkeypatch.setattr("ghweekly.main.CACHE_DIR", tmp_path)
+
+    def mock_get(self, url, **kwargs):
+        item = {"commit": {"author": {"date": "2025-01-07T10:00:00Z"}}}
+        return MockResponse(json_data=search_payload([item]))
+
+    monkeypatch.setattr("requests.Session.get", mock_get)
+    start, end = datetime(2025, 1, 6), datetime(2025, 2, 1)
+
+    # repos sharing a short name can't be stored as Parquet columns
+    df = fetch_weekly_commits("user", ["a/x", "b/x"], start, end, cache_ttl=600)
+    assert list(df.columns) == ["x", "x"]
+    assert not list(tmp_path.glob("*.parquet"))
+
+    fetch_weekly_commits("user", ["a/x"], start, end, cache_ttl=600)
+    (snapshot,) = tmp_path.glob("*.parquet")
+    snapshot.write_bytes(b"not parquet")
+    df = fetch_weekly_commits("user", ["a/x"], start, end, cache_ttl=600)
+    assert df["x"].sum() == 1
+
+
+def test_fetch_weekly_commits_does_not_cache_failed_run(monkeypatch, tmp_path):
+    pytest.importorskip("pyarrow")
+    monkeypatch.setattr("ghweekly.main.CACHE_DIR", tmp_path)
+    status = {"code": 403}
+
+    def mock_get(self, url, **kwargs):
+        if status["code"] != 200:
+            return MockResponse(status_code=status["code"])
+        item = {"commit": {"author": {"date": "2025-01-07T10:00:00Z"}}}
+        return MockResponse(json_data=search_payload([item]))
+
+    monkeypatch.setattr("requests.Session.get", mock_get)
+    args = ("user", ["org/repo1"], datetime(2025, 1, 6), datetime(2025, 2, 1))
+    df = fetch_weekly_commits(*args, cache_ttl=3600)
+    assert df["repo1"].sum() == 0
+    assert not list(tmp_path.glob("*.parquet"))
+
+    status["code"] = 200
+    df = fetch_weekly_commits(*args, cache_ttl=3600)
+    assert df["repo1"].sum() == 1
+    assert len(list(tmp_path.glob("*.parquet"))) == 1
+
+
+def test_fetch_commits_for_repo_requests_remaining_pages_concurrently():
+    def page(n):
+        return [{"commit": {"author": {"date": f"2025-01-{n:02d}T10:00:00Z"}}}]
+
+    last = "https://api.github.com/repositories/1/commits?per_page=100&page=3"
+    requested = []
+
+    class Session:
+        def get(self, url, params=None, **kwargs):
+            if "search" in url:
+                return MockResponse(status_code=403)
+            n = params.get("page", 1)
+            requested.append(n)
+            links = {"next": {"url": "unused"}, "last": {"url": last}}
+            return MockResponse(json_data=page(n), links=links if n == 1 else {})
+
+    dates = fetch_commits_for_repo(
+        "org/repo", "user", datetime(2025, 1, 1), datetime(2025, 2, 1), {}, Session()
+    )
+    assert sorted(requested) == [1, 2, 3]
+    assert [d.day for d in dates.tolist()] == [1, 2, 3]
+
+
+@pytest.mark.parametrize(
+    "links, expected",
+    [
+        ({}, 1),
+        ({"next": {"url": "https://api.github.com/x?page=2"}}, 1),
+        ({"last": {"url": "https://api.github.com/x?per_page=100&page=7"}}, 7),
+        ({"last": {"url": "https://api.github.com/x?page=oops"}}, 1),
+        ({"last": {"url": "https://api.github.com/x"}}, 1),
+    ],
+)
+def test_last_page(links, expected):
+    assert _last_page(links) == expected
+
+
+def test_fetch_commits_for_repo_counts_commit_matching_both_roles_once():
+    queries = []
+
+    class Session:
+        def get(self, url, params=None, **kwargs):
+            queries.append(params["q"].split(" ", 1)[0])
+            item = {
+                "sha": "commit123",
+                "commit": {"author": {"date": "2025-01-07T10:00:00Z"}},
+            }
+            return MockResponse(json_data=search_payload([item]))
+
+    dates = fetch_commits_for_repo(
+        "org/repo",
+        "user",
+        datetime(2025, 1, 1),
+        datetime(2025, 2, 1),
+        {},
+        Session(),
+        roles=("author", "committer"),
+    )
+    assert queries == ["author:user", "committer:user"]
+    assert dates.tolist() == [datetime(2025, 1, 7, 10)]
+
+
+def test_fetch_commits_for_repo_search_fetches_all_pages():
+    requested = []
+
+    class Session:
+        def get(self, url, params=None, **kwargs):
+            n = params["page"]
+            requested.append(n)
+            item = {"commit": {"author": {"date": f"2025-01-{n:02d}T10:00:00Z"}}}
+            return MockResponse(json_data={"total_count": 250, "items": [item]})
+
+    dates = fetch_commits_for_repo(
+        "org/repo", "user", datetime(2025, 1, 1), datetime(2025, 2, 1), {}, Session()
+    )
+    assert sorted(requested) == [1, 2, 3]
+    assert [d.day for d in dates.tolist()] == [1, 2, 3]
+
+
+def test_fetch_weekly_commits_uses_graphql_with_token(monkeypatch):
+    def contributions(name, nodes, total=None):
+        return {
+            "repository": {"nameWithOwner": name},
+            "contributions": {
+                "totalCount": len(nodes) if total is None else total,
+                "nodes": nodes,
+            },
+        }
+
+    by_repo = [
+        contributions(
+            "Org/Repo1",
+            [
+                {"occurredAt": "2025-01-07T08:00:00Z", "commitCount": 3},
+                {"occurredAt": "2025-01-14T08:00:00Z", "commitCount": 1},
+            ],
+        ),
+        contributions("org/repo3", [], total=150),
+    ]
+    payload = {
+        "data": {
+            "user": {
+                "contributionsCollection": {"commitContributionsByRepository": by_repo}
+            }
+        }
+    }
+    rest_calls = []
+
+    def mock_post(self, url, **kwargs):
+        assert kwargs["json"]["variables"]["login"] == "user"
+        return MockResponse(json_data=payload)
+
+    def mock_get(self, url, **kwargs):
+        rest_calls.append(kwargs["params"]["q"])
+        return MockResponse(json_data=search_payload([]))
+
+    monkeypatch.setattr("requests.Session.post", mock_post)
+    monkeypatch.setattr("requests.Session.get", mock_get)
+    df = fetch_weekly_commits(
+        "user",
+        ["org/repo1", "org/repo2", "org/repo3"],
+        datetime(2025, 1, 6),
+        datetime(2025, 2, 1),
+        {"Authorization": "token abc"},
+    )
+    assert df["repo1"].tolist()[:2] == [3, 1]
+    assert df["repo2"].sum() == 0
+    # repo3's contribution list was truncated, so it goes through REST.
+    assert len(rest_calls) == 1
+    assert "repo:org/repo3" in rest_calls[0]
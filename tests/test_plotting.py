@@ -0,0 +1,51 @@
+import pandas as pd
+from ghweekly.plotting import create_weekly_commits_plot
+
+
+def test_create_weekly_commits_plot(tmp_path):
+    weeks = pd.date_range("2025-01-06", periods=3, freq="7D")
+    df = pd.DataFrame({"repo1": [1, 0, 2], "repo2": [0, 3, 0]}, index=weeks)
+    output = tmp_path / "weekly_commits.png"
+    create_weekly_commits_plot(df, "testuser", output_file=output, show_plot=False)
+    assert output.exists()
+
+
+def test_create_weekly_commits_plot_labels_visible_segments(tmp_path):
+    weeks = pd.date_range("2025-01-06", periods=3, freq="7D")
+    df = pd.DataFrame({"repo1": [100, 0, 1], "repo2": [0, 3, 0]}, index=weeks)
+    fig = create_weekly_commits_plot(
+        df, "testuser", output_file=tmp_path / "out.png", show_plot=False
+    )
+    labels = [t.get_text() for t in fig.axes[0].texts]
+    assert sorted(labels) == ["100", "3"]
+
+
+def test_create_weekly_commits_plot_closes_figure(tmp_path):
+    import matplotlib.pyplot as plt
+
+    weeks = pd.date_range("2025-01-06", periods=3, freq="7D")
+    df = pd.DataFrame({"repo1": [1, 0, 2]}, index=weeks)
+    before = plt.get_fignums()
+    create_weekly_commits_plot(
+        df, "testuser", output_file=tmp_path / "out.png", show_plot=False
+    )
+    assert plt.get_fignums() == before
+
+
+def test_create_weekly_commits_plot_leaves_backend_alone(monkeypatch, tmp_path):
+    import matplotlib
+    import matplotlib.pyplot as plt
+
+    def fail(*args, **kwargs):
+        raise AssertionError("backend switched")
+
+    monkeypatch.setattr(matplotlib, "use", fail)
+    monkeypatch.setattr("ghweekly.plotting._has_display", lambda: False)
+    weeks = pd.date_range("2025-01-06", periods=3, freq="7D")
+    df = pd.DataFrame({"repo1": [1, 0, 2]}, index=weeks)
+    caller_fig = plt.figure()
+    try:
+        create_weekly_commits_plot(df, "testuser", output_file=tmp_path / "out.png")
+        assert plt.fignum_exists(caller_fig.number)
+    finally:
+        plt.close(caller_fig)